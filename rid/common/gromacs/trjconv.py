@@ -1,8 +1,8 @@
 import os, sys
 import logging
-from typing import Optional,Sequence
+from typing import Optional, Sequence, List, Tuple
 from rid.common.gromacs.gmx_constant import gmx_trjconv_cmd, gmx_traj_cmd
-from rid.constants import gmx_coord_name, gmx_force_name
+from rid.constants import gmx_coord_name, gmx_force_name, sel_gro_name_gmx
 from rid.utils import list_to_string
 from rid.utils import run_command
 
@@ -79,4 +79,45 @@ def slice_trjconv(
     assert return_code == 0, err
     
 
-    
\ No newline at end of file
+    
+
+
+def slice_trjconv_frames(
+        xtc: str,
+        top: str,
+        selected_frames: Sequence[int],
+        output_group: int = 0,
+        output: str = sel_gro_name_gmx,
+        frame_index: str = "frames.ndx"
+    ) -> Tuple[List[int], List[str]]:
+    """Dump several frames of `xtc` with a single `gmx trjconv` call.
+
+    The frames are passed to `trjconv -fr` as an index file and written
+    one per file by `-sep`, in increasing frame order. The index file is
+    removed afterwards. Returns the sorted unique frame numbers and the
+    names of the files they were written to.
+    """
+    logger.info("slicing trajectories by a single gmx trjconv command ...")
+    frames = sorted(set(int(frame) for frame in selected_frames))
+    if not frames:
+        return [], []
+    # index files count from 1 while trjconv counts frames from 0.
+    with open(frame_index, "w") as fn:
+        fn.write("[ frames ]\n")
+        fn.write(list_to_string([frame + 1 for frame in frames], "\n") + "\n")
+    cmd_list = gmx_trjconv_cmd.split()
+    cmd_list += ["-f", str(xtc)]
+    cmd_list += ["-s", str(top)]
+    cmd_list += ["-fr", frame_index]
+    cmd_list += ["-sep"]
+    cmd_list += ["-o", output]
+    logger.info(list_to_string(cmd_list, " "))
+    # the first answer selects the only group in `frame_index`.
+    return_code, out, err = run_command(
+        cmd_list,
+        stdin=f"0\n{output_group}\n"
+    )
+    os.remove(frame_index)
+    assert return_code == 0, err
+    base, ext = os.path.splitext(output)
+    return frames, [f"{base}{ii}{ext}" for ii in range(len(frames))]
@@ -7,7 +7,7 @@ import dpdata
 from mdtraj.geometry.dihedral import _atom_sequence, PHI_ATOMS, PSI_ATOMS
 import numpy as np
 from rid.constants import sel_gro_name_gmx, sel_gro_name
-from rid.common.gromacs.trjconv import slice_trjconv
+from rid.common.gromacs.trjconv import slice_trjconv, slice_trjconv_frames
 
 logging.basicConfig(
     format="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
@@ -93,10 +93,31 @@ def slice_xtc_mdtraj(
         output_format: str
     ):
     logger.info("slicing trajectories ...")
-    traj = md.load_xtc(xtc, top=top)
-    for sel in selected_idx:
-        frame = traj[sel]
-        frame.save_gro(output_format.format(walker=walker_idx,idx=sel))
+    topology = md.load_topology(str(top))
+    # keep one handle on the xtc and only read the selected frames, in file order.
+    with md.open(str(xtc)) as xtc_file:
+        for sel in sorted(set(int(sel) for sel in selected_idx)):
+            xtc_file.seek(sel)
+            xyz, time, _, box = xtc_file.read(n_frames=1)
+            frame = md.Trajectory(xyz=xyz, topology=topology, time=time)
+            frame.unitcell_vectors = box
+            frame.save_gro(output_format.format(walker=walker_idx,idx=sel))
+
+
+def slice_xtc_gmx_batch(
+        xtc: str,
+        top: str,
+        walker_idx: int,
+        selected_idx: Sequence,
+        output_format: str
+    ):
+    frames, sliced_files = slice_trjconv_frames(
+        xtc = xtc,
+        top = top,
+        selected_frames = selected_idx
+    )
+    for sel, sliced_file in zip(frames, sliced_files):
+        os.replace(sliced_file, output_format.format(walker=walker_idx,idx=sel))
 
 
 def slice_xtc(
@@ -114,6 +135,14 @@ def slice_xtc(
             selected_time = selected_idx,
             output = output
         )
+    elif style == "gmx_batch":
+        slice_xtc_gmx_batch(
+            xtc = xtc,
+            top = top,
+            walker_idx=walker_idx,
+            selected_idx = selected_idx,
+            output_format=output
+        )
     elif style == "mdtraj":
         slice_xtc_mdtraj(
             xtc = xtc,
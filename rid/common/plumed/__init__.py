@@ -3,6 +3,7 @@ from rid.common.plumed.make_plumed import (
     make_restraint_plumed,
     make_constraint_plumed,
     make_distance_list_from_file,
-    get_cv_name
+    get_cv_name,
+    build_cv_plan
 )
 from rid.common.plumed.check_plumed import check_deepfe_input
\ No newline at end of file
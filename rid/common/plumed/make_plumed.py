@@ -1,9 +1,11 @@
 import json
 import os
+import re
 import sys
 import logging
+import functools
 import numpy as np
-from typing import List, Union, Tuple, Dict, Optional, Sequence
+from typing import List, Union, Tuple, Dict, Optional, Sequence, NamedTuple
 from rid.utils import list_to_string
 from rid.common.mol import get_dihedral_from_resid, get_distance_from_atomid
 from rid.common.plumed.plumed_constant import (
@@ -27,6 +29,23 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Bind the formatters of the plumed templates once at import, so the hot
+# builders below do not look up `str.format` for every CV.
+_DIHEDRAL_NAME_TPL = dihedral_name.format
+_DISTANCE_NAME_TPL = distance_name.format
+_TORSION_TPL = dihedral_def_from_atoms.format
+_DISTANCE_TPL = distance_def_from_atoms.format
+_DEEPFE_TPL = deepfe_def.format
+_PRINT_TPL = print_def.format
+_RESTRAINT_TPL = restraint_def.format
+_UPPER_TPL = upper_def.format
+_LOWER_TPL = lower_def.format
+
+# An uncommented PRINT action in a user plumed file; group 1 is its ARG list.
+_PRINT_RE = re.compile(r"^[^#]*\bPRINT\b[^#]*\bARG=([^\s#]+)[^#]*$")
+_PRINT_STRIDE_RE = re.compile(r"\bSTRIDE=\S+")
+_PRINT_FILE_RE = re.compile(r"\bFILE=\S+")
+
 
 angle_id = {
     "phi": 0,
@@ -40,7 +59,7 @@ def make_restraint(
         kappa: Union[str, int, float],
         at: Union[str, int, float]
     ):
-    return restraint_def.format(
+    return _RESTRAINT_TPL(
                 name = name,
                 arg = arg,
                 kappa = kappa,
@@ -52,18 +71,50 @@ def make_restraint_list(
         kappa: List[Union[int, float, str]],
         at: List[Union[int, float, str]]
     ) -> Tuple[List, List]:
-    print(at)
-    res_names = []
-    res_list = []
     assert len(cv_list) == len(kappa), "Make sure `kappa` and `cv_names` have the same length."
     assert len(cv_list) == len(at), "Make sure `at` and `cv_names` have the same length."
-    for idx, cv_print in enumerate(cv_list):
-        res_name = "res-" + cv_print
-        res_names.append(res_name)
-        res_list.append(make_restraint(res_name, cv_print, kappa[idx], at[idx]))
+    if isinstance(kappa, np.ndarray):
+        kappa = kappa.tolist()
+    if isinstance(at, np.ndarray):
+        at = at.tolist()
+    res_names = ["res-" + cv_print for cv_print in cv_list]
+    res_list = [
+        _RESTRAINT_TPL(name = res_name, arg = cv_print, kappa = kap, at = cv_at)
+        for res_name, cv_print, kap, cv_at in zip(res_names, cv_list, kappa, at)
+    ]
     return res_list, res_names
 
 
+@functools.lru_cache(maxsize=16)
+def _restraint_block_template(cv_list: Tuple[str, ...]) -> str:
+    # one format string for all restraints, filled by `.format(kappa, at)`.
+    restraint_lines = []
+    for idx, cv_print in enumerate(cv_list):
+        cv_print = cv_print.replace("{", "{{").replace("}", "}}")
+        restraint_lines.append(_RESTRAINT_TPL(
+            name = "res-" + cv_print,
+            arg = cv_print,
+            kappa = "{0[%d]}" % idx,
+            at = "{1[%d]}" % idx
+        ))
+    return "\n".join(restraint_lines)
+
+def make_restraint_block(
+        cv_list: List[str],
+        kappa: List[Union[int, float, str]],
+        at: List[Union[int, float, str]]
+    ) -> List[str]:
+    assert len(cv_list) == len(kappa), "Make sure `kappa` and `cv_names` have the same length."
+    assert len(cv_list) == len(at), "Make sure `at` and `cv_names` have the same length."
+    if len(cv_list) == 0:
+        return []
+    if isinstance(kappa, np.ndarray):
+        kappa = kappa.tolist()
+    if isinstance(at, np.ndarray):
+        at = at.tolist()
+    return [_restraint_block_template(tuple(cv_list)).format(kappa, at)]
+
+
 def make_deepfe_bias(
         cv_list: List[str],
         trust_lvl_1: float = 1.0,
@@ -74,7 +125,7 @@ def make_deepfe_bias(
         return ""
     cv_string = list_to_string(cv_list, ",")
     model_string = list_to_string(model_list, ",")
-    return deepfe_def.format(
+    return _DEEPFE_TPL(
         trust_lvl_1 = trust_lvl_1,
         trust_lvl_2 = trust_lvl_2,
         model = model_string,
@@ -91,7 +142,7 @@ def make_print_bias(
         name_list.insert(0,"dpfe.bias")
     else:
         name_list.insert(0,name_list[0])
-    return print_def.format(
+    return _PRINT_TPL(
         stride = stride,
         arg = list_to_string(name_list, ","),
         file = file_name
@@ -102,7 +153,7 @@ def make_print(
         stride,
         file_name
     ) -> str:
-    return print_def.format(
+    return _PRINT_TPL(
         stride = stride,
         arg = list_to_string(name_list, ","),
         file = file_name
@@ -118,25 +169,25 @@ def make_wholemolecules(atom_index):
 
 def user_plumed_def(cv_file, pstride, pfile):
     logger.info("Custom CVs are created from plumed files.")
-    ret = ""
+    lines_out = []
     cv_names = []
     print_content = None
-    print("cv_file name",cv_file)
+    logger.debug("cv_file name %s", cv_file)
     with open(cv_file, 'r') as fp:
-        for line in fp.readlines():
-            if ("PRINT" in line) and ("#" not in line):
-                print_content = line + "\n"
-                cv_names = line.split()[2].split("=")[1].split(",")
+        for line in fp:
+            match = _PRINT_RE.match(line)
+            if match is not None:
+                print_content = line.strip()
+                cv_names = match.group(1).split(",")
                 break
-            ret += line
+            lines_out.append(line)
+    ret = "".join(lines_out)
     if ret == "" or cv_names == []:
         raise RuntimeError("Invalid customed plumed files.")
     if print_content is not None:
         assert len(print_content.split(",")) == len(cv_names), "There are {} CVs defined in the plumed file, while {} CVs are printed.".format(len(cv_names), len(print_content.split(",")) )
-        print_content_list = print_content.split()
-        print_content_list[-1] = "FILE={}".format(pfile)
-        print_content_list[1] = "STRIDE={}".format(str(pstride))
-        print_content = " ".join(print_content_list)
+        print_content = _PRINT_FILE_RE.sub(lambda _: "FILE={}".format(pfile), print_content)
+        print_content = _PRINT_STRIDE_RE.sub(lambda _: "STRIDE={}".format(pstride), print_content)
     return ret, cv_names, print_content
 
 
@@ -145,7 +196,7 @@ def make_torsion(
         atom_list: List[Union[int, str]]
     ) -> str:
     assert len(atom_list) == 4, f"Make sure dihedral angle defined by 4 atoms, not {len(atom_list)}."
-    return dihedral_def_from_atoms.format(
+    return _TORSION_TPL(
         name = name,
         a1 = atom_list[0], a2 = atom_list[1],
         a3 = atom_list[2], a4 = atom_list[3],
@@ -156,20 +207,20 @@ def make_distance(
         atom_list: List[Union[int, str]]
     ) -> str:
     assert len(atom_list) == 2, f"Make sure distance defined by 2 atoms, not {len(atom_list)}."
-    return distance_def_from_atoms.format(
+    return _DISTANCE_TPL(
         name = name,
         a1 = atom_list[0], a2 = atom_list[1]
     )
 
 
 def make_torsion_name(resid: int, angid: int):
-    return dihedral_name.format(
+    return _DIHEDRAL_NAME_TPL(
         resid = resid,
         angid = angid
     )
 
 def make_distance_name(atomids: list):
-    return distance_name.format(
+    return _DISTANCE_NAME_TPL(
     atomid1 = int(atomids[0]),
     atomid2 = int(atomids[1])
     )
@@ -177,39 +228,53 @@ def make_distance_name(atomids: list):
 def make_torsion_list(
         dihedral_info: Dict,
     ) -> Tuple[List, List]:
-    torsion_list = []
-    torsion_name_list = []
-    for resid in dihedral_info.keys():
-        for ang in dihedral_info[resid].keys():
-            torsion_name = make_torsion_name(resid=resid, angid = angle_id[ang])
-            torsion_name_list.append(torsion_name)
-            torsion_list.append(make_torsion(
-                name = torsion_name,
-                atom_list=list(dihedral_info[resid][ang])
-            ))
+    torsion_atoms = [
+        (resid, angle_id[ang], atom_list)
+        for resid, angles in dihedral_info.items()
+        for ang, atom_list in angles.items()
+    ]
+    torsion_name_list = [
+        _DIHEDRAL_NAME_TPL(resid = resid, angid = angid)
+        for resid, angid, _ in torsion_atoms
+    ]
+    torsion_list = [
+        _TORSION_TPL(name = torsion_name, a1 = a1, a2 = a2, a3 = a3, a4 = a4)
+        for torsion_name, (_, _, (a1, a2, a3, a4)) in zip(torsion_name_list, torsion_atoms)
+    ]
     return torsion_list, torsion_name_list
 
 def make_distance_list(
         distance_info: Dict,
     ) -> Tuple[List, List]:
-    distance_list = []
-    distance_name_list = []
-    for atomids in distance_info.keys():
-        dis = distance_info[atomids]
-        atom_list = atomids.split(" ")
-        distance_name = make_distance_name(atomids=atom_list)
-        distance_name_list.append(distance_name)
-        distance_list.append(make_distance(
-            name = distance_name,
-            atom_list=atom_list)
-        )
+    distance_atoms = [atomids.split(" ") for atomids in distance_info.keys()]
+    distance_name_list = [
+        _DISTANCE_NAME_TPL(atomid1 = int(a1), atomid2 = int(a2))
+        for a1, a2 in distance_atoms
+    ]
+    distance_list = [
+        _DISTANCE_TPL(name = distance_name, a1 = a1, a2 = a2)
+        for distance_name, (a1, a2) in zip(distance_name_list, distance_atoms)
+    ]
     return distance_list, distance_name_list
 
+@functools.lru_cache(maxsize=32)
+def _cached_dihedral(file_path: str, mtime_ns: int, selected_resid: Tuple[int, ...]) -> Dict:
+    return get_dihedral_from_resid(file_path, list(selected_resid))
+
+@functools.lru_cache(maxsize=32)
+def _cached_distance(file_path: str, mtime_ns: int, selected_atomid: Tuple[Tuple[int, ...], ...]) -> Dict:
+    return get_distance_from_atomid(file_path, [list(sid) for sid in selected_atomid])
+
+def _conf_key(file_path: str) -> Tuple[str, int]:
+    # the modification time invalidates cached CVs when `file_path` is rewritten.
+    file_path = os.path.abspath(file_path)
+    return file_path, os.stat(file_path).st_mtime_ns
+
 def make_torsion_list_from_file(
         file_path: str,
         selected_resid: List[int]
     ) -> Tuple[List, List]:
-    cv_info = get_dihedral_from_resid( file_path, selected_resid)
+    cv_info = _cached_dihedral(*_conf_key(file_path), tuple(selected_resid))
     logger.info("Create CVs (torsion) from selected residue ids.")
     assert len(cv_info.keys()) > 0, "No valid CVs created."
     return make_torsion_list(cv_info)
@@ -218,17 +283,66 @@ def make_distance_list_from_file(
         file_path: str,
         selected_atomid: List[int]
     ) -> Tuple[List, List]:
-    cv_info = get_distance_from_atomid(file_path, selected_atomid)
+    cv_info = _cached_distance(*_conf_key(file_path), tuple(tuple(sid) for sid in selected_atomid))
     logger.info("Create CVs (distance) from selected atom ids.")
     assert len(cv_info.keys()) > 0, "No valid CVs created."
     return make_distance_list(cv_info)
 
+class CVPlan(NamedTuple):
+    """Plumed definitions and names of the CVs of one run."""
+    content: Tuple[str, ...]
+    names: Tuple[str, ...]
+
+@functools.lru_cache(maxsize=16)
+def _cv_plan(
+        mode: str,
+        files: Tuple[Tuple[str, int], ...],
+        selected_resid: Tuple[int, ...],
+        selected_atomid: Tuple[Tuple[int, ...], ...]
+    ) -> CVPlan:
+    if mode == "torsion":
+        cv_content_list, cv_name_list = \
+            make_torsion_list_from_file(files[0][0], list(selected_resid))
+    elif mode == "distance":
+        cv_content_list, cv_name_list = \
+            make_distance_list_from_file(files[0][0], [list(sid) for sid in selected_atomid])
+    else:
+        # stride and output only change the PRINT line, which is not part of the plan.
+        for cv_file_, _ in files:
+            ret, cv_name_list, _ = user_plumed_def(cv_file_, 100, "plm.out")
+        cv_content_list = [ret]
+    return CVPlan(tuple(cv_content_list), tuple(cv_name_list))
+
+def build_cv_plan(
+        conf: Optional[str] = None,
+        cv_file: Optional[List[str]] = None,
+        selected_resid: Optional[List[int]] = None,
+        selected_atomid: Optional[List[int]] = None,
+        mode: str = "torsion"
+    ) -> CVPlan:
+    if mode in ("torsion", "distance"):
+        files = (_conf_key(conf),)
+    elif mode == "custom":
+        # pdb entries are not read by `user_plumed_def`, so they are not part of the key.
+        files = tuple(
+            _conf_key(cv_file_) for cv_file_ in cv_file
+            if not os.path.basename(cv_file_).endswith("pdb")
+        )
+    else:
+        raise RuntimeError("Unknown mode for making plumed files.")
+    return _cv_plan(
+        mode,
+        files,
+        tuple(selected_resid or ()),
+        tuple(tuple(sid) for sid in selected_atomid or ())
+    )
+
 def make_wall_list(
     cv_name_list,
     wall_list,
     iteration
 ):
-    ret = ""
+    wall_lines = []
     for index in range(len(wall_list)):
         if wall_list[index][0].upper() != "NONE":
             start = float(wall_list[index][1])
@@ -238,11 +352,11 @@ def make_wall_list(
             iteration_index = (iteration-1) % (iterations)
             at = start + (end - start)/(iterations-1)*(iteration_index)
             if wall_list[index][0].upper() == "UPPER":
-                line = upper_def.format(arg = cv_name_list[index], at=at,kappa=kappa,name="upper%s"%index)
+                line = _UPPER_TPL(arg = cv_name_list[index], at=at,kappa=kappa,name="upper%s"%index)
             elif wall_list[index][0].upper() == "LOWER":
-                line = lower_def.format(arg = cv_name_list[index], at=at,kappa=kappa,name="lower%s"%index)
-            ret += line+"\n"
-    return ret
+                line = _LOWER_TPL(arg = cv_name_list[index], at=at,kappa=kappa,name="lower%s"%index)
+            wall_lines.append(line + "\n")
+    return "".join(wall_lines)
 
 def make_restraint_plumed(
         conf: Optional[str] = None,
@@ -255,33 +369,22 @@ def make_restraint_plumed(
         output: str = "plm.out",
         mode: str = "torsion"
     ):
-    content_list = []
-    if mode == "torsion":
-        cv_content_list, cv_name_list = \
-            make_torsion_list_from_file(conf, selected_resid)
-        content_list += cv_content_list
-    elif mode == "distance":
-        cv_content_list, cv_name_list = \
-            make_distance_list_from_file(conf, selected_atomid)
-        content_list += cv_content_list
-    elif mode == "custom":
-        for cv_file_ in cv_file:
-            if not os.path.basename(cv_file_).endswith("pdb"):
-                ret, cv_name_list, _ = user_plumed_def(cv_file_, stride, output)
-        content_list.append(ret)
-    else:
-        raise RuntimeError("Unknown mode for making plumed files.")
-
-    if isinstance(kappa, int) or isinstance(kappa, float):
-        kappa = [kappa for _ in range(len(cv_name_list))]
-    if isinstance(at, int) or isinstance(at, float):
-        at = [at for _ in range(len(cv_name_list))]
-    res_list, _ = make_restraint_list(
-        cv_name_list, kappa, at
-    )
-    content_list += res_list
-    content_list.append(make_print(cv_name_list, stride, output))
-    return list_to_string(content_list, split_sign="\n")
+    cv_plan = build_cv_plan(conf, cv_file, selected_resid, selected_atomid, mode)
+    cv_content_list, cv_name_list = list(cv_plan.content), list(cv_plan.names)
+
+    n_cv = len(cv_name_list)
+    # scalars become stride-0 views; values are listed only when the restraints are formatted.
+    if np.ndim(kappa) == 0:
+        kappa = np.broadcast_to(np.asarray(kappa), (n_cv,))
+    if np.ndim(at) == 0:
+        at = np.broadcast_to(np.asarray(at), (n_cv,))
+    res_list = make_restraint_block(cv_name_list, kappa, at)
+    n_cv_content, n_res = len(cv_content_list), len(res_list)
+    content_list = [None] * (n_cv_content + n_res + 1)
+    content_list[:n_cv_content] = cv_content_list
+    content_list[n_cv_content:n_cv_content + n_res] = res_list
+    content_list[-1] = make_print(cv_name_list, stride, output)
+    return "\n".join(content_list)
 
 def make_constraint_plumed(
         conf: Optional[str] = None,
@@ -291,21 +394,13 @@ def make_constraint_plumed(
         output: str = "plm.out",
         mode: str = "distance"
     ):
-    content_list = []
-    if mode == "distance":
-        cv_content_list, cv_name_list = \
-            make_distance_list_from_file(conf, selected_atomid)
-        content_list += cv_content_list
-    elif mode == "custom":
-        for cv_file_ in cv_file:
-            if not os.path.basename(cv_file_).endswith("pdb"):
-                ret, cv_name_list, _ = user_plumed_def(cv_file_, stride, output)
-        content_list.append(ret)
-    else:
+    if mode not in ("distance", "custom"):
         raise RuntimeError("Unknown mode for making plumed files.")
+    cv_plan = build_cv_plan(conf, cv_file, None, selected_atomid, mode)
+    cv_content_list, cv_name_list = list(cv_plan.content), list(cv_plan.names)
 
-    content_list.append(make_print(cv_name_list, stride, output))
-    return list_to_string(content_list, split_sign="\n")
+    content_list = cv_content_list + [make_print(cv_name_list, stride, output)]
+    return "\n".join(content_list)
 
 def make_deepfe_plumed(
         conf: Optional[str] = None,
@@ -321,29 +416,16 @@ def make_deepfe_plumed(
         wall_list: Optional[List[str]] = None,
         iteration: Optional[str] = None
     ):
-    content_list = []
-    if mode == "torsion":
-        cv_content_list, cv_name_list = \
-            make_torsion_list_from_file(conf, selected_resid)
-        content_list += cv_content_list
-    elif mode == "distance":
-        cv_content_list, cv_name_list = \
-            make_distance_list_from_file(conf, selected_atomid)
-        content_list += cv_content_list
-    elif mode == "custom":
-        for cv_file_ in cv_file:
-            if not os.path.basename(cv_file_).endswith("pdb"):
-                ret, cv_name_list, _ = user_plumed_def(cv_file_, stride, output)
-        content_list.append(ret)
-    else:
-        raise RuntimeError("Unknown mode for making plumed files.")
+    cv_plan = build_cv_plan(conf, cv_file, selected_resid, selected_atomid, mode)
+    cv_content_list, cv_name_list = list(cv_plan.content), list(cv_plan.names)
+    content_list = cv_content_list
     if wall_list is not None:
         ret = make_wall_list(cv_name_list, wall_list, iteration)
         content_list.append(ret)
     deepfe_string = make_deepfe_bias(cv_name_list, trust_lvl_1, trust_lvl_2, model_list)
     content_list.append(deepfe_string)
     content_list.append(make_print_bias(cv_name_list, stride, output, model_list))
-    return list_to_string(content_list, split_sign="\n")
+    return "\n".join(content_list)
 
 
 def get_cv_name(
@@ -354,15 +436,5 @@ def get_cv_name(
         stride: int = 100,
         mode: str = "torsion"
     ):
-    if mode == "torsion":
-        _, cv_name_list = \
-            make_torsion_list_from_file(conf, selected_resid)
-    elif mode == "distance":
-        _, cv_name_list = make_distance_list_from_file(conf, selected_atomid)
-    elif mode == "custom":
-        for cv_file_ in cv_file:
-            if not os.path.basename(cv_file_).endswith("pdb"):
-                _, cv_name_list, _ = user_plumed_def(cv_file_, stride, "test.out")
-    else:
-        raise RuntimeError("Unknown mode for making plumed files.")
-    return cv_name_list
+    cv_plan = build_cv_plan(conf, cv_file, selected_resid, selected_atomid, mode)
+    return list(cv_plan.names)
@@ -1,8 +1,9 @@
 import json
 from pathlib import Path
-from typing import List, Union, Optional
+from typing import List, Union, Optional, Dict
 from rid.utils import load_json
 import os
+from concurrent.futures import ThreadPoolExecutor, Future
 
 from dflow import (
     Workflow,
@@ -18,6 +19,29 @@ from rid.utils import normalize_resources
 from .submit import prep_rid_op
 
 
+# steps that are always rerun when a workflow is resubmitted.
+_NOT_REUSED_STEPS = frozenset({"prepare-rid", "init-recorder"})
+
+
+def _upload_once(
+        executor: ThreadPoolExecutor,
+        uploaded: Dict,
+        paths: Union[str, List[str]]
+    ) -> Future:
+    # files are keyed by absolute path, so the same input given twice is uploaded once.
+    # lists are uploaded as given: their order decides e.g. which conf each walker starts from.
+    if isinstance(paths, List):
+        key = tuple(os.path.abspath(p) for p in paths)
+        if key not in uploaded:
+            uploaded[key] = executor.submit(
+                upload_artifact, [Path(p) for p in paths], archive=None)
+    else:
+        key = os.path.abspath(paths)
+        if key not in uploaded:
+            uploaded[key] = executor.submit(upload_artifact, Path(paths), archive=None)
+    return uploaded[key]
+
+
 def resubmit_rid(
         workflow_id: str,
         confs: Union[str, List[str]],
@@ -54,110 +78,112 @@ def resubmit_rid(
         retry_times=None
     )
 
-    if isinstance(confs, str):
-        confs_artifact = upload_artifact(Path(confs), archive=None)
-    elif isinstance(confs, List):
-        confs_artifact = upload_artifact([Path(p) for p in confs], archive=None)
-    else:
-        raise RuntimeError("Invalid type of `confs`.")
-    
-    if index_file is None:
-        index_file_artifact = None
-    else:
-        index_file_artifact = upload_artifact(Path(index_file), archive=None)
-    
-    jdata = load_json(rid_config)
-    
-    inputfiles = []
-    if "inputfile" in jdata["ExploreMDConfig"]:
-        inputfiles.append(jdata["ExploreMDConfig"]["inputfile"])
-        if "inputfile" in jdata["LabelMDConfig"]:
-            inputfiles.append(jdata["LabelMDConfig"]["inputfile"])
-               
-    fe_models = []
-    assert isinstance(jdata["init_models"],list), "model input should be list."
-    for model in jdata["init_models"]:
-        fe_models.append(model)
-    
-    cvfiles = []
-    if "cv_file" in jdata["CV"]:
-        assert isinstance(jdata["CV"]["cv_file"],list), "CV file input should be list."
-        for file in jdata["CV"]["cv_file"]:
-            cvfiles.append(file)
-            
-    dp_models = []
-    if "dp_model" in jdata["ExploreMDConfig"]:
-        assert isinstance(jdata["ExploreMDConfig"]["dp_model"],list), "model input should be list."
-        for model in jdata["ExploreMDConfig"]["dp_model"]:
-            dp_models.append(model)
-                
-    inputfile_list = []
-    cvfile_list = []
-    model_list = []
-    dpfile_list = []
-    if otherfiles is not None:
-        for file in otherfiles:
-            if os.path.basename(file) in inputfiles:
-                inputfile_list.append(file)
-            elif os.path.basename(file) in cvfiles:
-                cvfile_list.append(file)
-                
-    if dp_files is not None:
-        for dp_file in dp_files:
-            dpfile_list.append(dp_file)
-            
-    if models is not None:
-        for model in models:
-            if os.path.basename(model) in fe_models:
-                model_list.append(model)
-            elif os.path.basename(model) in dp_models:
-                dpfile_list.append(model)
-            
-    if len(inputfile_list) == 0:
-        inputfile_artifact = None
-    else:
-        inputfile_artifact = upload_artifact([Path(p) for p in inputfile_list], archive=None)
-        
-    if len(model_list) == 0:
-        models_artifact = None
-    else:
-        models_artifact = upload_artifact([Path(p) for p in model_list], archive=None)
-        
-    if len(cvfile_list) == 0:
-        cv_file_artifact = None
-    else:
-        cv_file_artifact = upload_artifact([Path(p) for p in cvfile_list], archive=None)
-        
-    if len(dpfile_list) == 0:
-        dp_files_artifact = None
-    elif isinstance(dp_files, List):
-        dp_files_artifact = upload_artifact([Path(p) for p in dpfile_list], archive=None)
-    else:
-        raise RuntimeError("Invalid type of `dp_files`.")
-    
-    if forcefield is None:
-        forcefield_artifact = None
-    else:
-        forcefield_artifact = upload_artifact(Path(forcefield), archive=None)
-        
-    if topology is None:
-        top_artifact = None
-    else:
-        top_artifact = upload_artifact(Path(topology), archive=None)
-        
-    if data_file is None:
-        data_artifact = None
-    else:
-        data_artifact = upload_artifact(Path(data_file), archive=None)
-    rid_config = upload_artifact(Path(rid_config), archive=None)
+    # uploads only wait on the network, so they run side by side and are collected when the step is built.
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        uploaded = {}
+        if isinstance(confs, str):
+            confs_artifact = _upload_once(executor, uploaded, confs)
+        elif isinstance(confs, List):
+            confs_artifact = _upload_once(executor, uploaded, confs)
+        else:
+            raise RuntimeError("Invalid type of `confs`.")
 
-    rid_steps = Step(
-        "rid-procedure",
-        rid_op,
-        artifacts={
+        if index_file is None:
+            index_file_artifact = None
+        else:
+            index_file_artifact = _upload_once(executor, uploaded, index_file)
+
+        rid_config_artifact = _upload_once(executor, uploaded, rid_config)
+        jdata = load_json(rid_config)
+
+        inputfiles = []
+        if "inputfile" in jdata["ExploreMDConfig"]:
+            inputfiles.append(jdata["ExploreMDConfig"]["inputfile"])
+            if "inputfile" in jdata["LabelMDConfig"]:
+                inputfiles.append(jdata["LabelMDConfig"]["inputfile"])
+
+        fe_models = []
+        assert isinstance(jdata["init_models"],list), "model input should be list."
+        for model in jdata["init_models"]:
+            fe_models.append(model)
+
+        cvfiles = []
+        if "cv_file" in jdata["CV"]:
+            assert isinstance(jdata["CV"]["cv_file"],list), "CV file input should be list."
+            for file in jdata["CV"]["cv_file"]:
+                cvfiles.append(file)
+
+        dp_models = []
+        if "dp_model" in jdata["ExploreMDConfig"]:
+            assert isinstance(jdata["ExploreMDConfig"]["dp_model"],list), "model input should be list."
+            for model in jdata["ExploreMDConfig"]["dp_model"]:
+                dp_models.append(model)
+
+        inputfile_list = []
+        cvfile_list = []
+        model_list = []
+        dpfile_list = []
+        if otherfiles is not None:
+            inputfile_set, cvfile_set = set(inputfiles), set(cvfiles)
+            for file, basename in zip(otherfiles, map(os.path.basename, otherfiles)):
+                if basename in inputfile_set:
+                    inputfile_list.append(file)
+                elif basename in cvfile_set:
+                    cvfile_list.append(file)
+
+        if dp_files is not None:
+            for dp_file in dp_files:
+                dpfile_list.append(dp_file)
+
+        if models is not None:
+            fe_model_set, dp_model_set = set(fe_models), set(dp_models)
+            for model, basename in zip(models, map(os.path.basename, models)):
+                if basename in fe_model_set:
+                    model_list.append(model)
+                elif basename in dp_model_set:
+                    dpfile_list.append(model)
+
+        if len(inputfile_list) == 0:
+            inputfile_artifact = None
+        else:
+            inputfile_artifact = _upload_once(executor, uploaded, inputfile_list)
+
+        if len(model_list) == 0:
+            models_artifact = None
+        else:
+            models_artifact = _upload_once(executor, uploaded, model_list)
+
+        if len(cvfile_list) == 0:
+            cv_file_artifact = None
+        else:
+            cv_file_artifact = _upload_once(executor, uploaded, cvfile_list)
+
+        if len(dpfile_list) == 0:
+            dp_files_artifact = None
+        elif isinstance(dp_files, List):
+            dp_files_artifact = _upload_once(executor, uploaded, dpfile_list)
+        else:
+            raise RuntimeError("Invalid type of `dp_files`.")
+
+        if forcefield is None:
+            forcefield_artifact = None
+        else:
+            forcefield_artifact = _upload_once(executor, uploaded, forcefield)
+
+        if topology is None:
+            top_artifact = None
+        else:
+            top_artifact = _upload_once(executor, uploaded, topology)
+
+        if data_file is None:
+            data_artifact = None
+        else:
+            data_artifact = _upload_once(executor, uploaded, data_file)
+
+        upload_futures = {
             "topology": top_artifact,
             "confs": confs_artifact,
-            "rid_config": rid_config,
+            "rid_config": rid_config_artifact,
             "models": models_artifact,
             "forcefield": forcefield_artifact,
             "index_file": index_file_artifact,
@@ -165,7 +191,16 @@ def resubmit_rid(
             "data_file": data_artifact,
             "dp_files": dp_files_artifact,
             "cv_file": cv_file_artifact
-        },
+        }
+        artifacts = {
+            name: None if future is None else future.result()
+            for name, future in upload_futures.items()
+        }
+
+    rid_steps = Step(
+        "rid-procedure",
+        rid_op,
+        artifacts=artifacts,
         parameters={}
         )
     old_workflow = Workflow(id=workflow_id)
@@ -173,30 +208,23 @@ def resubmit_rid(
 
     succeeded_steps = []
     restart_flag = 1
+    restart_iter = None if iteration is None else int(iteration)
     for step in all_steps:
-        if step["type"] == "Pod":
-            # if step["phase"] == "Succeeded":
-            if step["key"] != "prepare-rid" and step["key"] != "init-recorder":
-                pod_key = step["key"]
-                if pod_key is not None:
-                    pod_key_list = pod_key.split("-")
-                    pod_iter = int(pod_key_list[1])
-                    pod_step = "-".join(pod_key_list[2:-1])
-                    if iteration is not None:
-                        if pod is not None:
-                            if pod_iter == int(iteration) and pod_step == pod:
-                                restart_flag = 0
-                        else:
-                            if pod_iter == int(iteration):
-                                restart_flag = 0
-                    else:
-                        if step["phase"] != "Succeeded":
-                            restart_flag = 0
-                        else:
-                            restart_flag = 1
-                
-                if restart_flag == 1:
-                    succeeded_steps.append(step)
+        if step["type"] != "Pod" or step["key"] in _NOT_REUSED_STEPS:
+            continue
+        pod_key = step["key"]
+        if pod_key is not None:
+            pod_key_list = pod_key.split("-")
+            pod_iter = int(pod_key_list[1])
+            pod_step = "-".join(pod_key_list[2:-1])
+            if restart_iter is not None:
+                if pod_iter == restart_iter and (pod is None or pod_step == pod):
+                    restart_flag = 0
+            else:
+                restart_flag = 1 if step["phase"] == "Succeeded" else 0
+
+        if restart_flag == 1:
+            succeeded_steps.append(step)
     wf = Workflow("reinforced-dynamics-continue", pod_gc_strategy="OnPodSuccess", parallelism=50)
     wf.add(rid_steps)
     wf.submit(reuse_step=succeeded_steps)
@@ -91,8 +91,9 @@ class RunSelect(OP):
             - `selected_indices`: (`Artifact(Path)`) Indices of selected conformation files (`selected_confs`) in trajectories.
         """
 
-        cls_sel_idx = np.load(op_in["cluster_selection_index"])
-        cls_sel_data = np.load(op_in["cluster_selection_data"])
+        # only the selected rows are needed, so map the arrays instead of reading them whole.
+        cls_sel_idx = np.load(op_in["cluster_selection_index"], mmap_mode="r")
+        cls_sel_data = np.load(op_in["cluster_selection_data"], mmap_mode="r")
 
         task_path = Path(op_in["task_name"])
         task_path.mkdir(exist_ok=True, parents=True)
@@ -106,15 +107,13 @@ class RunSelect(OP):
                 stds = make_std(cls_sel_data, models=op_in["models"])
                 save_txt("cls_"+model_devi_name, stds, fmt=model_devi_precision)
                 _selected_idx = select_from_devi(stds, op_in["trust_lvl_1"])
-            sel_idx = cls_sel_idx[_selected_idx]
+            sel_idx = np.asarray(cls_sel_idx[_selected_idx])
             save_txt(sel_ndx_name, sel_idx, fmt="%d")
-            sel_data = cls_sel_data[_selected_idx]
+            sel_data = np.asarray(cls_sel_data[_selected_idx])
             if op_in["slice_mode"] == "gmx":
-                assert op_in["dt"] is not None, "Please provide time step to slice trajectory."
-                for ii, sel in enumerate(sel_idx):
-                    time = sel * op_in["dt"] * op_in["output_freq"]
-                    slice_xtc(xtc=op_in["xtc_traj"], top=op_in["topology"],
-                            walker_idx=walker_idx,selected_idx=time, output=sel_gro_name.format(walker=walker_idx,idx=sel), style="gmx")
+                # frames are dumped by index in one `gmx trjconv` call, so `dt` is not required here.
+                slice_xtc(xtc=op_in["xtc_traj"], top=op_in["topology"],
+                        walker_idx=walker_idx, selected_idx=sel_idx, output=sel_gro_name, style="gmx_batch")
             elif op_in["slice_mode"] == "mdtraj":
                 slice_xtc(xtc=op_in["xtc_traj"], top=op_in["topology"],
                         walker_idx = walker_idx, selected_idx=sel_idx, output=sel_gro_name, style="mdtraj")
@@ -125,15 +124,14 @@ class RunSelect(OP):
             conf_list = []
             cv_init_list = []
             conf_tags = {}
+            conf_name_format = sel_lmp_name if op_in["slice_mode"] == "dpdata" else sel_gro_name
             for ii, sel in enumerate(sel_idx):
-                if op_in["slice_mode"] == "dpdata":
-                    conf_list.append(task_path.joinpath(sel_lmp_name.format(walker=walker_idx,idx=sel)))
-                    conf_tags[sel_lmp_name.format(walker = walker_idx,idx=sel)] = f"{op_in['task_name']}_{sel}"
-                elif op_in["slice_mode"] == "gmx" or op_in["slice_mode"] == "mdtraj" :
-                    conf_list.append(task_path.joinpath(sel_gro_name.format(walker=walker_idx,idx=sel)))
-                    conf_tags[sel_gro_name.format(walker = walker_idx,idx=sel)] = f"{op_in['task_name']}_{sel}"
-                save_txt(cv_init_label.format(walker=walker_idx,idx=sel), sel_data[ii])
-                cv_init_list.append(task_path.joinpath(cv_init_label.format(walker=walker_idx,idx=sel)))
+                conf_name = conf_name_format.format(walker=walker_idx,idx=sel)
+                conf_list.append(task_path.joinpath(conf_name))
+                conf_tags[conf_name] = f"{op_in['task_name']}_{sel}"
+                cv_init_name = cv_init_label.format(walker=walker_idx,idx=sel)
+                save_txt(cv_init_name, sel_data[ii])
+                cv_init_list.append(task_path.joinpath(cv_init_name))
             
         op_out = OPIO(
             {
@@ -36,11 +36,8 @@ class ConfSelector:
 
 def select_from_devi(model_devi, threshold):
     logger.info("select conformations by model deviations.")
-    selected_idx = []
-    for idx, _std in enumerate(model_devi):
-        if _std > threshold:
-            selected_idx.append(idx)
-    selected_idx = np.array(selected_idx, dtype=int)
+    model_devi = np.asarray(model_devi)
+    selected_idx = np.flatnonzero(model_devi > threshold).astype(int, copy=False)
     logger.info("max std: %f, min std: %f, avg std %f \n" % (
         np.max(model_devi), np.min(model_devi), np.average(model_devi)))
     logger.info("number of angles than %f is %d" % (threshold, len(selected_idx)))
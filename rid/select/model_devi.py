@@ -52,6 +52,7 @@ def make_std(
         # threshold: float = 1.0
     ):
 
+    data = np.asarray(data)
     nframes = data.shape[0]
 
     forces = []
@@ -59,9 +60,10 @@ def make_std(
         graph = load_graph(str(model))
         with tf.Session(graph=graph) as sess:
             _, force = test_ef(sess, data)
-            forces = np.append(forces, force)
+            forces.append(force)
 
-    forces = np.reshape(forces, [len(models), nframes, -1])
+    # models run in float32; deviations are computed in float64 as before.
+    forces = np.reshape(np.stack(forces).astype(np.float64), [len(models), nframes, -1])
     forces *= f_cvt
 
     avg_std = compute_std(forces)
@@ -0,0 +1,72 @@
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from mock import patch
+from context import rid
+import rid.common.plumed.make_plumed as make_plumed
+from rid.common.plumed import (
+    build_cv_plan,
+    get_cv_name,
+    make_restraint_plumed,
+    make_deepfe_plumed
+)
+
+
+class Test_CVPlan(unittest.TestCase):
+    def setUp(self):
+        self.datapath = Path("data")
+        self.tmpdir = Path(tempfile.mkdtemp())
+        self.cv_file = self.tmpdir/"plumed.dat"
+        shutil.copy(self.datapath/"plumed.dat", self.cv_file)
+        make_plumed._cv_plan.cache_clear()
+        make_plumed._cached_dihedral.cache_clear()
+        make_plumed._cached_distance.cache_clear()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def touch(self, file_name):
+        stat = os.stat(file_name)
+        os.utime(file_name, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_custom_cached(self):
+        with patch('rid.common.plumed.make_plumed.user_plumed_def',
+                   wraps=make_plumed.user_plumed_def) as mocked_def:
+            names = get_cv_name(cv_file=[self.cv_file], mode="custom")
+            self.assertEqual(get_cv_name(cv_file=[self.cv_file], mode="custom"), names)
+            make_restraint_plumed(cv_file=[self.cv_file], kappa=0.5, at=1.0, mode="custom")
+            self.assertEqual(mocked_def.call_count, 1)
+        self.assertEqual(names, ["dih-002-00", "dih-002-01"])
+
+    def test_torsion_cached(self):
+        with patch('rid.common.plumed.make_plumed.get_dihedral_from_resid',
+                   wraps=make_plumed.get_dihedral_from_resid) as mocked_dih:
+            names = get_cv_name(conf=self.datapath/"conf.gro", selected_resid=[1, 2], mode="torsion")
+            make_restraint_plumed(conf=self.datapath/"conf.gro", selected_resid=[1, 2],
+                                  kappa=0.5, at=[1.0] * len(names), mode="torsion")
+            self.assertEqual(mocked_dih.call_count, 1)
+
+    def test_mtime_invalidates(self):
+        plan = build_cv_plan(cv_file=[self.cv_file], mode="custom")
+        content = self.cv_file.read_text().replace("dih-002-01", "dih-002-02")
+        self.cv_file.write_text(content)
+        self.touch(self.cv_file)
+        new_plan = build_cv_plan(cv_file=[self.cv_file], mode="custom")
+        self.assertIsNot(new_plan, plan)
+        self.assertEqual(new_plan.names, ("dih-002-00", "dih-002-02"))
+
+    def test_print_bias_keeps_plan(self):
+        plan = build_cv_plan(cv_file=[self.cv_file], mode="custom")
+        names = plan.names
+        plm_content = make_deepfe_plumed(cv_file=[self.cv_file], model_list=["graph.pb"], mode="custom")
+        self.assertIn("ARG=dpfe.bias,dih-002-00,dih-002-01", plm_content)
+        self.assertIs(build_cv_plan(cv_file=[self.cv_file], mode="custom"), plan)
+        self.assertEqual(plan.names, names)
+        self.assertEqual(get_cv_name(cv_file=[self.cv_file], mode="custom"), list(names))
+
+    def test_pdb_not_read(self):
+        missing_pdb = self.tmpdir/"missing.pdb"
+        plan = build_cv_plan(cv_file=[missing_pdb, self.cv_file], mode="custom")
+        self.assertEqual(plan.names, ("dih-002-00", "dih-002-01"))
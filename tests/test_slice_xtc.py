@@ -0,0 +1,61 @@
+import os
+import shutil
+import unittest
+import numpy as np
+from pathlib import Path
+from mock import patch
+from context import rid
+from rid.common.mol import slice_xtc
+from rid.utils import set_directory
+from rid.constants import sel_gro_name
+
+
+class Test_SliceXtcGmxBatch(unittest.TestCase):
+    def setUp(self):
+        self.taskname = "000"
+        self.walker_idx = 0
+        self.task_path = Path(self.taskname)
+        self.task_path.mkdir(exist_ok=True, parents=True)
+        self.frame_index = None
+
+    def tearDown(self):
+        shutil.rmtree(self.task_path)
+
+    def fake_trjconv(self, cmd_list, stdin=None):
+        # record the index file handed to trjconv and mimic the `-sep` outputs.
+        frame_index = cmd_list[cmd_list.index("-fr") + 1]
+        self.assertTrue(os.path.isfile(frame_index))
+        with open(frame_index, "r") as fn:
+            self.frame_index = fn.read()
+        self.assertIn("-sep", cmd_list)
+        output = cmd_list[cmd_list.index("-o") + 1]
+        base, ext = os.path.splitext(output)
+        nframes = len(self.frame_index.split()) - 3
+        for ii in range(nframes):
+            with open(f"{base}{ii}{ext}", "w") as fn:
+                fn.write(f"frame {ii}")
+        return 0, "", ""
+
+    @patch('rid.common.gromacs.trjconv.run_command')
+    def test(self, mocked_run):
+        mocked_run.side_effect = self.fake_trjconv
+        with set_directory(self.task_path):
+            slice_xtc(xtc="traj_comp.xtc", top="topol.top", walker_idx=self.walker_idx,
+                selected_idx=np.array([5, 2, 5, 9]), output=sel_gro_name, style="gmx_batch")
+        mocked_run.assert_called_once()
+        # index files count frames from 1, in increasing order without duplicates.
+        self.assertEqual(self.frame_index, "[ frames ]\n3\n6\n10\n")
+        for ii, sel in enumerate([2, 5, 9]):
+            conf = self.task_path.joinpath(sel_gro_name.format(walker=self.walker_idx, idx=sel))
+            self.assertTrue(conf.is_file())
+            self.assertEqual(conf.read_text(), f"frame {ii}")
+        self.assertEqual(sorted(os.listdir(self.task_path)),
+            sorted(sel_gro_name.format(walker=self.walker_idx, idx=sel) for sel in [2, 5, 9]))
+
+    @patch('rid.common.gromacs.trjconv.run_command')
+    def test_empty(self, mocked_run):
+        with set_directory(self.task_path):
+            slice_xtc(xtc="traj_comp.xtc", top="topol.top", walker_idx=self.walker_idx,
+                selected_idx=np.array([], dtype=int), output=sel_gro_name, style="gmx_batch")
+        mocked_run.assert_not_called()
+        self.assertEqual(os.listdir(self.task_path), [])